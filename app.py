@@ -83,8 +83,14 @@ def rag(util, green=0.75, amber=0.85):
         return "AMBER"
     return "GREEN"
 
-def read_excel(file_bytes):
-    xl = pd.ExcelFile(file_bytes)
+@st.cache_data(show_spinner=False, max_entries=16, ttl=3600)
+def read_excel(file_bytes: bytes):
+    # Keyed on the raw upload bytes, so the workbook is only parsed once per file
+    try:
+        # Rust-backed reader; needs python-calamine and pandas >= 2.2
+        xl = pd.ExcelFile(BytesIO(file_bytes), engine="calamine")
+    except (ImportError, ValueError):
+        xl = pd.ExcelFile(BytesIO(file_bytes), engine="openpyxl")
     if "Tableau_Export" not in xl.sheet_names:
         return None, None, None
 
@@ -98,10 +104,35 @@ def read_excel(file_bytes):
         df = xl.parse("Tableau_Export", skiprows=1).dropna(how="all")
         df.columns = [str(c).strip() for c in df.columns]
 
+    # County as a categorical: categories come out sorted, so the dropdown needs no per-rerun sort
+    if "County" in df.columns:
+        county = df["County"]
+        df["County"] = county.where(county.isna(), county.astype(str).str.strip()).astype("category")
+
     arrivals = xl.parse("County_Arrivals") if "County_Arrivals" in xl.sheet_names else None
     history = xl.parse("History") if "History" in xl.sheet_names else None
     return df, arrivals, history
 
+@st.cache_data(show_spinner=False, max_entries=16, ttl=3600)
+def _coerce_numeric(df, cols):
+    df = df.copy()
+    cols = [c for c in cols if c in df.columns]
+    df[cols] = df[cols].apply(pd.to_numeric, errors="coerce")
+    return df
+
+@st.cache_data(show_spinner=False, max_entries=16, ttl=3600)
+def _index_by_county(df):
+    # Unique County index (first row wins) for O(1) .loc lookups
+    indexed = df.set_index("County", drop=False)
+    return indexed[~indexed.index.duplicated(keep="first")]
+
+@st.cache_data(show_spinner=False, max_entries=16, ttl=3600)
+def to_csv_bytes(df):
+    buf = BytesIO()
+    df.to_csv(buf, index=False, encoding="utf-8")
+    return buf.getvalue()
+
+@st.cache_data(show_spinner=False, max_entries=16, ttl=3600)
 def compute_state_rollup(df):
     ap_state = df["AP"].sum(skipna=True)
     cap_state = (df["FTE_on"] * df["P_eff"]).sum(skipna=True)
@@ -117,6 +148,26 @@ def compute_state_rollup(df):
         "Backlog_End_state": df["Backlog_End"].sum(skipna=True),
     }
 
+def manual_compute(fte_on, buffer, backlog_start, completed_points_base, avg_fte_base, wbar_current, wbar_baseline, ap):
+    p_ref = completed_points_base / avg_fte_base
+    cpf = (wbar_current / wbar_baseline) if wbar_baseline > 0 else 1.0
+    p_eff = p_ref / cpf if cpf > 0 else 0.0
+    cap_eff = fte_on * p_eff
+    util = ap / cap_eff if cap_eff > 0 else float("nan")
+    backlog_end = backlog_start + ap - cap_eff
+    fte_required = (ap / p_eff) + buffer if p_eff > 0 else float("nan")
+    gap = fte_required - fte_on if pd.notna(fte_required) else float("nan")
+    return {
+        "p_ref": p_ref,
+        "cpf": cpf,
+        "p_eff": p_eff,
+        "cap_eff": cap_eff,
+        "util": util,
+        "backlog_end": backlog_end,
+        "fte_required": fte_required,
+        "gap": gap,
+    }
+
 # ---------------------------
 # Upload mode (counties + dashboards)
 # ---------------------------
@@ -134,36 +185,37 @@ if MODE == "Upload Excel (recommended)":
             st.text(DATA_DICTIONARY_TEXT)
         st.stop()
 
-    df, arrivals, history = read_excel(up)
+    data = up.getvalue()
+    df, arrivals, history = read_excel(data)
     if df is None or df.empty:
         st.error("Could not read the Tableau_Export sheet. Please upload the ACASM workbook.")
         st.stop()
 
     # numeric conversion
     num_cols = ["AP","CPF","P_ref","P_eff","FTE_on","Utilization","Backlog_Start","Backlog_End","FTE_required","Gap"]
-    for c in num_cols:
-        if c in df.columns:
-            df[c] = pd.to_numeric(df[c], errors="coerce")
+    df = _coerce_numeric(df, num_cols)
 
-    counties = sorted([c for c in df["County"].dropna().unique()])
+    counties = list(df["County"].cat.categories)
     sel = st.sidebar.selectbox("Select county", counties, index=0)
 
-    row = df[df["County"]==sel].head(1).iloc[0]
+    df_indexed = _index_by_county(df)
+    row = df_indexed.loc[sel]
+    vals = row.to_dict()
     st.subheader(f"County: {sel}")
 
     k1,k2,k3,k4,k5 = st.columns(5)
-    k1.metric("Arrival Points (AP)", f"{row.get('AP',0):,.2f}")
-    k2.metric("CPF", f"{row.get('CPF',0):.3f}")
-    k3.metric("P_eff", f"{row.get('P_eff',0):,.2f}")
-    k4.metric("Utilization", f"{row.get('Utilization',0):.3f}")
-    k5.metric("RAG", row.get("RAG", rag(row.get("Utilization"))))
+    k1.metric("Arrival Points (AP)", f"{vals.get('AP',0):,.2f}")
+    k2.metric("CPF", f"{vals.get('CPF',0):.3f}")
+    k3.metric("P_eff", f"{vals.get('P_eff',0):,.2f}")
+    k4.metric("Utilization", f"{vals.get('Utilization',0):.3f}")
+    k5.metric("RAG", vals.get("RAG", rag(vals.get("Utilization"))))
 
     k6,k7,k8,k9,k10 = st.columns(5)
-    k6.metric("FTE On", f"{row.get('FTE_on',0):,.2f}")
-    k7.metric("FTE Required", f"{row.get('FTE_required',0):,.2f}")
-    k8.metric("Gap", f"{row.get('Gap',0):,.2f}")
-    k9.metric("Backlog Start", f"{row.get('Backlog_Start',0):,.2f}")
-    k10.metric("Backlog End", f"{row.get('Backlog_End',0):,.2f}")
+    k6.metric("FTE On", f"{vals.get('FTE_on',0):,.2f}")
+    k7.metric("FTE Required", f"{vals.get('FTE_required',0):,.2f}")
+    k8.metric("Gap", f"{vals.get('Gap',0):,.2f}")
+    k9.metric("Backlog Start", f"{vals.get('Backlog_Start',0):,.2f}")
+    k10.metric("Backlog End", f"{vals.get('Backlog_End',0):,.2f}")
 
     st.divider()
     st.subheader("State of Minnesota (rollup from counties)")
@@ -186,7 +238,7 @@ if MODE == "Upload Excel (recommended)":
         st.dataframe(df, use_container_width=True)
         st.download_button(
             "Download County Metrics CSV",
-            data=df.to_csv(index=False).encode("utf-8"),
+            data=to_csv_bytes(df),
             file_name="acasm_county_metrics.csv",
             mime="text/csv",
         )
@@ -210,22 +262,18 @@ else:
     st.markdown("### Baseline productivity")
     completed_points_base = st.number_input("Completed points (baseline period)", min_value=0.0, value=10000.0, step=100.0)
     avg_fte_base = st.number_input("Average FTE (baseline period)", min_value=0.1, value=12.0, step=0.5)
-    p_ref = completed_points_base / avg_fte_base
 
     st.markdown("### Complexity")
     wbar_current = st.number_input("Average case weight (current W̄)", min_value=0.0, value=1.80, step=0.01)
     wbar_baseline = st.number_input("Average case weight (baseline W̄)", min_value=0.0, value=1.70, step=0.01)
-    cpf = (wbar_current / wbar_baseline) if wbar_baseline > 0 else 1.0
-    p_eff = p_ref / cpf if cpf > 0 else 0.0
 
     st.markdown("### Arrivals (Arrival Points AP)")
     ap = st.number_input("Arrival Points (AP)", min_value=0.0, value=8000.0, step=100.0)
 
-    cap_eff = fte_on * p_eff
-    util = ap / cap_eff if cap_eff > 0 else float("nan")
-    backlog_end = backlog_start + ap - cap_eff
-    fte_required = (ap / p_eff) + buffer if p_eff > 0 else float("nan")
-    gap = fte_required - fte_on if pd.notna(fte_required) else float("nan")
+    m = manual_compute(fte_on, buffer, backlog_start, completed_points_base, avg_fte_base, wbar_current, wbar_baseline, ap)
+    p_ref, cpf, p_eff = m["p_ref"], m["cpf"], m["p_eff"]
+    cap_eff, util, backlog_end = m["cap_eff"], m["util"], m["backlog_end"]
+    fte_required, gap = m["fte_required"], m["gap"]
 
     st.divider()
     c1,c2,c3,c4,c5 = st.columns(5)